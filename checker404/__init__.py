@@ -0,0 +1,5 @@
+from .checker import Checker, DEFAULT_USER_AGENT
+from .checks import Verdict
+from .output import JsonlWriter
+
+__all__ = ["Checker", "Verdict", "DEFAULT_USER_AGENT", "JsonlWriter"]
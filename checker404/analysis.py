@@ -0,0 +1,159 @@
+import concurrent.futures
+import logging
+import multiprocessing
+import queue
+import threading
+
+
+BAD_TEXTS = ["not found", "not exist", "don't exist", "can't be found", "invalid page", "invalid webpage", "invalid path", "cannot get path "]
+PROBABLE_HTML_TAGS = ["h1", "h2", "h3", "title"]
+ENABLE_JS_TEXTS = ["enable javascript", "requires javascript", "javascript is disabled"]
+ANALYSIS_BATCH_SIZE = 32 # Max pages sent to a worker process at once
+ANALYSIS_BATCH_WAIT = 0.005 # Max seconds waiting for more pages before sending a batch
+
+
+#######################
+#### HTML ANALYSIS ####
+#######################
+
+def parse_html(html, encoding=None):
+    """
+    **Parses** the HTML (text, or bytes in `encoding`).
+    The HTML parser is only imported the first time this is needed.
+    """
+    from bs4 import BeautifulSoup
+
+    if isinstance(html, bytes):
+        return BeautifulSoup(html, 'html.parser', from_encoding=encoding)
+    return BeautifulSoup(html, 'html.parser')
+
+def get_title(soup):
+    """
+    Returns the text of the `<title>` of the parsed HTML (or None).
+    """
+    if soup.title is None:
+        return None
+    return soup.title.get_text().strip()
+
+def has_bad_titles(soup, url):
+    """
+    **Checks** if any of the `PROBABLE_HTML_TAGS` of the parsed HTML contains one of the `BAD_TEXTS`.
+    Returns True if so, else None (the bad title rule of the checks relies on it).
+    """
+    # We check if any of the htlm tags has some text similar to the ones in BAD_TEXTS array
+    for prob_tag in PROBABLE_HTML_TAGS:
+        for tag in soup.find_all(prob_tag):
+            for bad_text in BAD_TEXTS:
+                if bad_text in tag.get_text().lower():
+                    logging.info("      [-] Bad text found for url {}: {}".format(url, bad_text))
+                    return True
+
+def analyze_page(url, body, encoding, baseline=None):
+    """
+    **Runs** the body-level checks of a page given its raw `body` bytes.
+    `baseline` is an optional (url, body, encoding) of the folder 404 whose titles must also be checked.
+    Returns a dict with the `title`, `bad_title`, `needs_js` and `baseline_bad_title` (None without baseline).
+    """
+    soup = parse_html(body, encoding)
+    try:
+        text = body.decode(encoding or "utf-8", errors="replace").lower()
+    except LookupError: # Unknown charset announced by the server
+        text = body.decode("utf-8", errors="replace").lower()
+    result = {
+        "title": get_title(soup),
+        "bad_title": has_bad_titles(soup, url),
+        "needs_js": any(enable_js_txt in text for enable_js_txt in ENABLE_JS_TEXTS),
+        "baseline_bad_title": None,
+    }
+
+    if baseline is not None:
+        baseline_url, baseline_body, baseline_encoding = baseline
+        result["baseline_bad_title"] = has_bad_titles(parse_html(baseline_body, baseline_encoding), baseline_url)
+
+    return result
+
+def analyze_batch(pages):
+    """
+    **Analyzes** a list of `analyze_page` argument tuples (this runs in the worker processes).
+    """
+    return [analyze_page(*page) for page in pages]
+
+
+class HtmlAnalyzer:
+    """
+    **Offloads** `analyze_page` to a pool of `processes` worker processes so the parsing of the HTML
+    doesn't compete for the GIL with the threads doing the requests.
+
+    The pages are queued by the threads and sent to the pool in batches of up to `batch_size` pages
+    (only the raw bytes of the bodies are sent, not the responses).
+    The workers are started with `forkserver` (or `spawn`) as forking them lazily from a process
+    already running the request threads could copy locks held by those threads.
+    """
+
+    def __init__(self, processes, batch_size=ANALYSIS_BATCH_SIZE, batch_wait=ANALYSIS_BATCH_WAIT):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(start_method))
+        self.pending = queue.Queue()
+        self.dispatcher = threading.Thread(target=self.dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def analyze(self, url, body, encoding, baseline=None):
+        """
+        Same as `analyze_page`, but run in the pool. Blocks until the result is ready.
+        """
+        future = concurrent.futures.Future()
+        self.pending.put(((url, body, encoding, baseline), future))
+        return future.result()
+
+    def dispatch(self):
+        """
+        **Groups** the queued pages in batches and sends them to the pool.
+        """
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.pending.get(timeout=self.batch_wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self.submit(batch)
+            if stop:
+                return
+
+    def submit(self, batch):
+        futures = [future for _, future in batch]
+        try:
+            batch_future = self.pool.submit(analyze_batch, [page for page, _ in batch])
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        def set_results(batch_future):
+            try:
+                results = batch_future.result()
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                return
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+        batch_future.add_done_callback(set_results)
+
+    def close(self):
+        self.pending.put(None)
+        self.dispatcher.join()
+        self.pool.shutdown()
@@ -0,0 +1,310 @@
+import concurrent.futures
+import dataclasses
+import logging
+import math
+import multiprocessing
+import random
+import time
+from datetime import datetime
+
+from .analysis import HtmlAnalyzer
+from .checks import Verdict, check_js_methods, check_non_js_methods, get_route_pattern
+from .filters import filter_and_normalize_urls
+from .profiler import HostProfiler
+from .redirects import RedirectRules
+from .sitemaps import check_based_on_sitemaps
+from .state import ScanState
+from .transport import Transport
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+MAX_JS_RUNNING_TIME = 10*60*60 # Give a max time running of 10 hours to the browser processes
+
+logger = logging.getLogger(__name__)
+
+
+# Aux function to divide a file into chunks
+def chunks_from_lines(l, n):
+    # looping till length l
+    for i in range(0, len(l), n):
+        yield l[i:i + n]
+
+
+class Checker:
+    """
+    **Checks** a list of URLs and yields a `Verdict` for each of them as soon as it's decided.
+
+    The stages are the same as the CLI ones:
+      1) Filter and normalize the URLs.
+      2) Accept the URLs found in the sitemaps of their domains.
+      3) Check the rest with plain HTTP requests (`threads` threads).
+      4) Render the undecided ones with a headless browser (`processes` processes).
+
+    All the HTTP requests share a `Transport` with keep-alive pools sized from `threads`
+    (multiplexed over HTTP/2 if `http2` is set and `httpx` is installed).
+
+    With a `state_file` the checks are incremental: the URLs (and folder baselines) that didn't
+    change since the previous run keep their previous verdict instead of being checked again.
+
+    With `host_profiles` the baselines of the folders of a host stop being probed once a few
+    of them show that the host always answers the same to nonexistent paths.
+
+    With `analysis_processes` the HTML of the responses is parsed in that many worker processes
+    instead of in the threads doing the requests.
+
+    With `learn_redirects` the canonicalization redirects of each host (http -> https, `www.`,
+    trailing slash) are learned and the next URLs of the host are requested directly where
+    they would be redirected.
+
+    The progress of the stages is logged (at INFO level) to the `checker404` logger.
+    """
+
+    def __init__(self, threads=50, processes=None, user_agent=DEFAULT_USER_AGENT, max_urls=50000, http2=False, state_file=None, host_profiles=True, analysis_processes=0, learn_redirects=True):
+        if processes is None:
+            processes = multiprocessing.cpu_count() if multiprocessing.cpu_count() > 1 else 1
+
+        self.threads = threads
+        self.processes = processes
+        self.user_agent = user_agent
+        self.max_urls = max_urls
+        self.transport = Transport(threads=threads, user_agent=user_agent, http2=http2)
+        self.state = ScanState(state_file) if state_file else None
+        self.profiler = HostProfiler() if host_profiles else None
+        self.analyzer = HtmlAnalyzer(analysis_processes) if analysis_processes > 0 else None
+        self.redirects = RedirectRules() if learn_redirects else None
+
+        self.cache_404 = {} # 404 URL of a folder -> its baseline response
+        self.cache_404_badpt = {} # Final URL of a baseline -> if it has "not found" texts in its titles
+        self.domain_data = {} # Sitemaps and URLs discovered of each domain
+        self.sitemaps_downloaded = set()
+
+    def close(self):
+        self.transport.close()
+        if self.analyzer:
+            self.analyzer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def check(self, urls):
+        """
+        **Checks** the given URLs and yields a `Verdict` per checked URL.
+        URLs removed by the filters or over `max_urls` don't get a verdict.
+        """
+        all_urls = list(urls)
+        good_urls = []
+
+        # Filter and normalize URLs to reduce the number of tests
+        logger.info("Started with {} URLs".format(len(all_urls)))
+        all_urls = filter_and_normalize_urls(all_urls)
+        logger.info("Reduced URLs to {} after filtering".format(len(all_urls)))
+
+        # Check the sitemaps first
+        all_urls = check_based_on_sitemaps(all_urls, good_urls, self.transport, self.domain_data, self.sitemaps_downloaded)
+        logger.info("Reduced URLs to {} after sitemaps".format(len(all_urls)))
+
+        random.shuffle(all_urls)
+
+        if len(all_urls) > self.max_urls:
+            logger.warning(f"Too many URLs ({len(all_urls)}). Only the first {self.max_urls} will be checked.")
+            all_urls = all_urls[:self.max_urls]
+            good_urls = good_urls[:self.max_urls]
+
+        for url in good_urls:
+            yield Verdict(url, url, True, "sitemap")
+
+        js_urls = {} # Final URL to check with the JS engine -> HTTP verdicts of the input URLs that ended there
+        shells = {} # Final URL to check with the JS engine -> fingerprint of its HTML before rendering
+        multithread_start = time.time()
+        for verdict in self.check_http(all_urls):
+            if verdict.good is None:
+                js_urls.setdefault(verdict.final_url, []).append(verdict)
+                if verdict.shell_digest:
+                    shells[verdict.final_url] = verdict.shell_digest
+            else:
+                if self.state:
+                    self.state.record_verdict(verdict.url, verdict)
+                yield verdict
+        multithread_end = time.time()
+        logger.info("Multithread time: {}".format(multithread_end - multithread_start))
+
+        if self.profiler:
+            for host, (kind, skipped) in self.profiler.report().items():
+                if skipped:
+                    logger.info(f"Skipped {skipped} 404 probes of {host} (profiled as {kind})")
+
+        check_js_urls_list = list(js_urls)
+        multiprocess_start = time.time()
+        for js_verdict in self.check_js(check_js_urls_list, shells):
+            for http_verdict in js_urls.get(js_verdict.url, []):
+                verdict = self.merge_js_verdict(http_verdict, js_verdict)
+                if self.state:
+                    self.state.record_verdict(verdict.url, verdict)
+                yield verdict
+        multiprocess_end = time.time()
+        logger.info("Multiprocess time: {}".format(multiprocess_end - multiprocess_start))
+
+        if self.state:
+            self.state.save()
+
+    def check_http(self, urls):
+        """
+        **Checks** the URLs with plain HTTP requests in `threads` threads, yielding verdicts as they finish.
+
+        The URLs are submitted a few at a time so the redirect rules learned from the first responses
+        of a host are applied to the next ones, and the URLs that would end up in the same request
+        are collapsed into a single check (they get a copy of its verdict). If the trailing slash added by the
+        rewrite failed and the URL was requested without it, the URLs collapsed into it are checked again on their own.
+        """
+        pending = iter(urls)
+        retry = [] # Input URLs collapsed into a rewritten URL that failed
+        in_flight = {} # Future -> (input URL checked, URL requested)
+        waiting = {} # URL requested -> other input URLs waiting for its verdict
+        done = {} # URL requested -> verdict
+        collapsed = rewritten = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.threads) as executor:
+            while True:
+                while len(in_flight) < self.threads * 2:
+                    url = retry.pop() if retry else next(pending, None)
+                    if url is None:
+                        break
+
+                    request_url = self.redirects.rewrite(url) if self.redirects else url
+                    if request_url in done:
+                        collapsed += 1
+                        yield self.copy_verdict(done[request_url], url, request_url)
+                    elif request_url in waiting:
+                        collapsed += 1
+                        waiting[request_url].append(url)
+                    else:
+                        waiting[request_url] = []
+                        future = executor.submit(check_non_js_methods, url, self.transport, self.state, self.profiler, self.analyzer, self.redirects, self.cache_404, self.cache_404_badpt)
+                        in_flight[future] = (url, request_url)
+
+                if not in_flight:
+                    break
+
+                finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    url, request_url = in_flight.pop(future)
+                    try:
+                        verdict = future.result()  # This will re-raise any exception caught during the execution
+                    except Exception as e:
+                        logger.error(f"Thread exception: {e}")
+                        for failed_url in [url] + waiting.pop(request_url):
+                            yield Verdict(failed_url, None, False, "error")
+                        continue
+
+                    if verdict.url != request_url and verdict.requested_url != request_url:
+                        # The trailing slash added failed, so its verdict is only valid for the URL requested instead
+                        collapsed -= len(waiting[request_url])
+                        retry.extend(waiting.pop(request_url))
+                        yield verdict
+                        continue
+
+                    done[request_url] = verdict
+                    if verdict.requested_url:
+                        rewritten += 1
+                    yield verdict
+                    for url in waiting.pop(request_url):
+                        yield self.copy_verdict(verdict, url, request_url)
+
+        if self.redirects:
+            logger.info(f"Requested {rewritten} URLs directly where their hosts redirect and collapsed {collapsed} URLs into already requested ones")
+
+    def copy_verdict(self, verdict, url, request_url):
+        """
+        Returns the verdict of `request_url` for another input `url` collapsed into it
+        (in incremental mode `url` also gets the stored validators of that response).
+        """
+        if self.state:
+            self.state.copy_url_response(verdict.url, url)
+        return dataclasses.replace(verdict, url=url, requested_url=request_url if request_url != url else None)
+
+    @staticmethod
+    def merge_js_verdict(http_verdict, js_verdict):
+        """
+        Returns the verdict of an input URL sent to the JS engine: the decision of the render of its final URL
+        with the response metadata of the HTTP checks and the time spent in each phase of both stages.
+        """
+        timings = dict(http_verdict.timings)
+        for phase, seconds in js_verdict.timings.items():
+            timings[phase] = timings.get(phase, 0) + seconds
+        return dataclasses.replace(http_verdict, final_url=js_verdict.final_url or http_verdict.final_url, good=js_verdict.good, reason=js_verdict.reason,
+                                   title=js_verdict.title or http_verdict.title, timings=timings, render_cached=js_verdict.render_cached)
+
+    def check_js(self, urls, shells=None):
+        """
+        **Renders** the URLs in `processes` browser processes, yielding verdicts as they arrive.
+        URLs still pending when the processes time out are considered good, and the ones
+        left unchecked by a process that died are considered bad.
+
+        `shells` maps the URLs to the fingerprint of their HTML before rendering (see `get_shell_fingerprint`). The URLs with the same
+        shell and route pattern are sent to the same process, and all the processes share the rendered
+        404 baselines and the cache of outcomes, so those URLs are only rendered once.
+        """
+        shells = shells or {}
+        if not urls:
+            logger.info("No JS URLs to check")
+            return
+
+        manager = multiprocessing.Manager()
+        p_verdicts = manager.list() # Creates a special type of list that can be safely manipulated by multiple processes.
+        baselines = manager.dict()
+        render_cache = manager.dict()
+        jobs = []
+        timed_out = []
+        checked = set()
+
+        # Keep the URLs that may reuse the same render together
+        urls = sorted(urls, key=lambda url: (shells.get(url, ""), get_route_pattern(url)))
+        parts_len = math.ceil(len(urls)/self.processes)
+        parts = list(chunks_from_lines(urls, parts_len))
+
+        for part in parts[:self.processes]:
+            part_shells = {url: shells[url] for url in part if url in shells}
+            p = multiprocessing.Process(target=check_js_methods, args=(part, p_verdicts, self.user_agent, part_shells, baselines, render_cache))
+            jobs.append((p, part))
+            p.start()
+        all_jobs = list(jobs)
+
+        start_time = datetime.now()
+        seen = 0
+
+        while (datetime.now() - start_time).seconds < MAX_JS_RUNNING_TIME:
+            time.sleep(1)  # short sleep to prevent busy looping
+            for verdict in p_verdicts[seen:]:
+                seen += 1
+                checked.add(verdict.url)
+                yield verdict
+
+            jobs = [(proc, part) for proc, part in jobs if proc.is_alive()]  # remove completed processes from the list
+            if not jobs:  # if no jobs remain, break out of the loop
+                break
+
+        else:  # if the loop completed normally (not by 'break')
+            for proc, part in jobs:  # terminate all remaining jobs
+                if proc.is_alive():
+                    logger.warning("Process is still running, timeout occurred.")
+                    proc.terminate()
+                    timed_out.append(proc)
+
+        # Verdicts appended between the last poll and the end of the processes
+        for verdict in p_verdicts[seen:]:
+            checked.add(verdict.url)
+            yield verdict
+
+        for proc, part in all_jobs:
+            for url in part:
+                if url not in checked:
+                    checked.add(url)
+                    if proc in timed_out:
+                        yield Verdict(url, url, True, "js-timeout")
+                    else:
+                        yield Verdict(url, url, False, "js-process-died")
+
+        manager.shutdown()
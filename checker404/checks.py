@@ -0,0 +1,508 @@
+import hashlib
+import logging
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+from urllib.parse import urlparse
+
+import urllib3
+from urllib3.exceptions import InsecureRequestWarning
+
+from .analysis import analyze_page, has_bad_titles, parse_html
+from .filters import get_path_parts
+from .state import ScanState
+
+
+urllib3.disable_warnings(InsecureRequestWarning)
+logger = logging.getLogger(__name__)
+
+# Per-response values of an HTML shell that don't change what it renders
+NONCE_RE = re.compile(r"""\bnonce=("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+INLINE_SCRIPT_RE = re.compile(r"(<script\b[^>]*>).*?(</script>)", re.IGNORECASE | re.DOTALL)
+META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+META_TOKEN_RE = re.compile(r"""\b(?:name|property|http-equiv)=["']?[^"'>]*(?:token|csrf|nonce)""", re.IGNORECASE)
+META_CONTENT_RE = re.compile(r"""\bcontent=("[^"]*"|'[^']*'|[^\s>]+)""", re.IGNORECASE)
+
+
+@dataclass
+class Verdict:
+    """
+    Result of checking a single URL.
+
+    `good` is True if the URL looks legit, False if it looks like a (masked) 404
+    and None if the HTTP checks couldn't decide and the URL needs the JS engine.
+    `reason` is a short tag of the rule that took the decision.
+    The rest of the fields are the metadata of the response the decision was based on
+    (when there was one) and the seconds spent in each phase (`fetch`, `baseline`, `analysis`, `render`).
+    `reused` is True when the verdict comes from the previous run of the incremental mode.
+    `host_profile` is the profile of the host used instead of probing the baseline of the folder (if any).
+    `requested_url` is the URL requested instead of `url` because of a learned redirect rule (if any).
+    `body_digest` is the SHA-256 of the body fetched by the HTTP checks.
+    `shell_digest` is the digest of that body without its per-response tokens (see `get_shell_fingerprint`), for the URLs needing the JS engine.
+    `render_cached` is True when the JS outcome was reused from a URL with the same HTML shell and route.
+    """
+    url: str
+    final_url: Optional[str]
+    good: Optional[bool]
+    reason: str
+    status_code: Optional[int] = None
+    redirect_chain: list = field(default_factory=list)
+    content_type: Optional[str] = None
+    content_length: Optional[int] = None
+    title: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+    reused: bool = False
+    host_profile: Optional[str] = None
+    requested_url: Optional[str] = None
+    body_digest: Optional[str] = None
+    shell_digest: Optional[str] = None
+    render_cached: bool = False
+
+    def decide(self, good, reason):
+        self.good = good
+        self.reason = reason
+        return self
+
+    def add_response(self, response):
+        """
+        Stores the metadata of a `requests.Response` (or `H2Response`).
+        """
+        self.final_url = response.url
+        self.status_code = response.status_code
+        self.redirect_chain = [resp.url for resp in response.history]
+        self.content_type = response.headers.get("Content-Type")
+        self.content_length = len(response.content)
+        self.body_digest = hashlib.sha256(response.content).hexdigest()
+
+    def add_page(self, page, response):
+        """
+        Stores the metadata of a rendered Playwright `page` and the `response` of its navigation.
+        """
+        self.final_url = page.url
+        self.title = page.title()
+        if response is not None:
+            self.status_code = response.status
+            self.content_type = response.headers.get("content-type")
+            chain = []
+            request = response.request.redirected_from
+            while request is not None:
+                chain.insert(0, request.url)
+                request = request.redirected_from
+            self.redirect_chain = chain
+
+    def to_dict(self):
+        return asdict(self)
+
+
+########################
+#### check for 404s ####
+########################
+
+
+def check_redirects(url, response, response_404):
+    #logging.info("  [*] Checking if webpage with no redirects returns a bad code")
+    origin_url = urlparse(url)
+
+    # We create a list of probable simple redirects
+    origin_list = [
+        origin_url.hostname,
+        "http://" + origin_url.hostname,
+        "https://" + origin_url.hostname,
+        "http://" + origin_url.hostname + "/",
+        "https://" + origin_url.hostname + "/",
+        "http://" + origin_url.hostname + "/#",
+        "https://" + origin_url.hostname + "/#",
+        "http://" + origin_url.hostname + ":80",
+        "https://" + origin_url.hostname + ":443",
+        "http://" + origin_url.hostname + ":80/",
+        "https://" + origin_url.hostname + ":443/",
+        "http://" + origin_url.hostname + ":80/#",
+        "https://" + origin_url.hostname + ":443/#",
+    ]
+
+    # If redirects URls in list, bad
+    if response.history:
+        if response.url in origin_list:
+            logging.info("      [-] Bad redirect found: {}".format(response.url))
+            return True
+        for resp in response.history:
+            if resp.is_redirect or resp.is_permanent_redirect:
+                if resp.headers.get("Location", "none") in origin_list:
+                    logging.info("      [-] Bad redirect found from {} to {}".format(response.url, resp.headers.get("Location", "none")))
+                    return True
+
+    # If same URL as a real 404, bad
+    if response_404:
+        if response.url == response_404.url:
+            logging.info("      [-] Bad redirect with 404 found: {}".format(response.url))
+            return True
+
+    return False
+
+def analyze_response(r, r_404, analyzer=None, cache_404_badpt=None):
+    """
+    **Runs** the body-level checks of the response (and the titles check of its baseline, once per baseline)
+    in the `HtmlAnalyzer` worker processes, or in this thread without analyzer.
+    `cache_404_badpt` maps the final URL of each baseline to the result of its titles check.
+    """
+    cache_404_badpt = {} if cache_404_badpt is None else cache_404_badpt
+    baseline = None
+    if r_404 and r_404.url not in cache_404_badpt:
+        baseline = (r_404.url, r_404.content, r_404.encoding)
+
+    if analyzer:
+        result = analyzer.analyze(r.url, r.content, r.encoding, baseline)
+    else:
+        result = analyze_page(r.url, r.content, r.encoding, baseline)
+
+    if baseline is not None:
+        cache_404_badpt[r_404.url] = result["baseline_bad_title"]
+    elif r_404:
+        result["baseline_bad_title"] = cache_404_badpt[r_404.url]
+    return result
+
+
+def js_checks(ini_url, page, html):
+    # Having accessed the URL with a browser, check the response (`html` is its rendered DOM)
+
+    parsed_url = urlparse(page.url)
+    parsed_ini_url = urlparse(ini_url)
+
+    # Redirection case
+    if ini_url != page.url:
+        logging.info("      [!] JS redirection detected to {}".format(page.url))
+        if parsed_url.path in ["/", "/#"] and parsed_ini_url.path != parsed_url.path:
+            logging.info(f"      [-] JS of {ini_url} redirected to root!")
+            return "js-redirect-to-root"
+
+    if has_bad_titles(parse_html(html), page.url):
+        return "js-bad-title"
+
+    return None
+
+def get_route_pattern(url):
+    """
+    Returns the route of the URL with the folders containing digits (ids, dates...) replaced by `*`.
+    e.g. 'https://example.com/products/1234/reviews' -> 'https://example.com/products/*/reviews'
+    """
+    parsed, path_parts = get_path_parts(url)
+    path_parts = ["*" if any(c.isdigit() for c in part) else part for part in path_parts]
+    return f"{parsed.scheme}://{parsed.netloc}/" + "/".join(path_parts)
+
+def get_render_fingerprint(html, urls):
+    """
+    Returns a digest of the rendered DOM ignoring the paths of the given URLs
+    (SPAs usually print the requested path in their "not found" views).
+    """
+    for url in urls:
+        path = urlparse(url).path
+        if len(path) > 1:
+            html = html.replace(path, "")
+    return hashlib.sha256(html.encode("utf-8", errors="replace")).hexdigest()
+
+def get_shell_fingerprint(body):
+    """
+    Returns a digest of the HTML shell of a page (its body before rendering) ignoring the values that change
+    in every response: `nonce=` attributes, the contents of inline scripts (state, CSRF tokens...)
+    and the content of the token `<meta>` tags.
+    """
+    html = body.decode("utf-8", errors="replace")
+    html = NONCE_RE.sub('nonce=""', html)
+    html = INLINE_SCRIPT_RE.sub(r"\1\2", html)
+    html = META_TAG_RE.sub(lambda tag: META_CONTENT_RE.sub('content=""', tag.group(0)) if META_TOKEN_RE.search(tag.group(0)) else tag.group(0), html)
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+def render_baseline(page, url_404, baselines):
+    """
+    **Renders** the nonexistent path of a folder (once per folder, `baselines` is shared by the browser processes).
+    Returns (final URL, fingerprint) of the rendered 404, or None if it couldn't be rendered.
+    """
+    if url_404 in baselines:
+        return baselines[url_404]
+
+    baseline = None
+    try:
+        logging.info(f"  [*] Rendering the 404 of {url_404}")
+        page.goto(url_404)
+        baseline = (page.url, get_render_fingerprint(page.content(), [url_404, page.url]))
+    except Exception as e:
+        logging.info(f"      [!] Couldn't render the 404 of {url_404}\n{e}")
+
+    baselines[url_404] = baseline
+    return baseline
+
+
+def get_404_url(url):
+    """
+    Returns the URL of a nonexistent path in the same folder as `url`.
+    """
+    if len(url.split("/")) > 3:
+        return "/".join(url.split("/")[:-1])+"/real404i32rohuf"
+    else: # In case something like "https://example.com" withuot not extra path
+        return url + "/real404i32rohuf"
+
+def check_baseline_unchanged(url_404, transport, state, cache_404):
+    """
+    **Checks** with a conditional request if the baseline of a folder is the same as in the last run.
+    The folders skipped by a host profile are unchanged if the sampled baseline they were equivalent to is.
+    """
+    unchanged = state.is_baseline_unchanged(url_404)
+    if unchanged is not None:
+        return unchanged
+
+    entry = state.get_baseline(url_404)
+    if not entry:
+        return False
+    if entry.get("profiled_as"):
+        return check_baseline_unchanged(entry["profiled_as"], transport, state, cache_404)
+
+    try:
+        r_404 = transport.get(url_404, timeout=5, allow_redirects=True, headers=ScanState.conditional_headers(entry))
+    except Exception as e:
+        logging.info(f"  [!] Timeout while revalidating the 404 of {url_404}\n{e}")
+        return False
+
+    if r_404 and r_404.status_code != 304:
+        cache_404[url_404] = r_404
+    state.record_baseline(url_404, r_404)
+    return state.is_baseline_unchanged(url_404)
+
+
+def check_non_js_methods(url, transport, state=None, profiler=None, analyzer=None, redirects=None, cache_404=None, cache_404_badpt=None):
+    """
+    **Checks** the URL with plain HTTP requests (through the shared `transport`)
+    comparing it with a real 404 of the same folder.
+    `cache_404` (404 URL -> baseline response) and `cache_404_badpt` (see `analyze_response`)
+    keep the baselines between calls, so they should be shared by all the checks of a run.
+    With a `ScanState` (incremental mode) conditional requests are sent and the verdict
+    of the last run is reused if neither the URL nor its folder baseline changed.
+    With a `HostProfiler` the folder baselines stop being probed once the host is profiled.
+    With an `HtmlAnalyzer` the HTML of the responses is analyzed in its worker processes.
+    With `RedirectRules` the URL (and its 404 probe) is requested directly where its host would redirect it.
+    Returns a `Verdict` (`good` is None when the JS engine is needed to decide).
+    """
+    cache_404 = {} if cache_404 is None else cache_404
+    logging.info("[*] Checking URL: {}".format(url))
+    verdict = Verdict(url, None, None, "")
+    prev = state.get_url(url) if state else None
+    if prev and not prev.get("verdict"):
+        prev = None # Without a verdict to reuse, a 304 would be useless
+
+    request_url = url
+    if redirects:
+        request_url = redirects.rewrite(url)
+        if request_url != url:
+            logging.info(f"  [*] Requesting {request_url} instead of {url} as the host redirects there")
+            verdict.requested_url = request_url
+
+    start = time.perf_counter()
+    while True:
+        try:
+            r = transport.get(request_url, timeout=5, headers=ScanState.conditional_headers(prev))
+        except:
+            logging.info("  [!] Timeout while awaiting for get request. Retrying..")
+            try:
+                r = transport.get(request_url, timeout=10, headers=ScanState.conditional_headers(prev)) #Max timeout reduced to 10s
+            except:
+                logging.info(f"  [!] Timeout while awaiting for get request for {url}. Page might be down. Removing")
+                verdict.timings["fetch"] = time.perf_counter() - start
+                return verdict.decide(False, "unreachable")
+
+        if r.status_code < 400 or urlparse(request_url).path != urlparse(url).path + "/":
+            break
+        # The trailing slash added failed (e.g. an API folder not accepting it), so request the URL without it
+        redirects.reject(request_url)
+        logging.info(f"  [!] {request_url} answered {r.status_code}, requesting it without the trailing slash")
+        request_url = redirects.rewrite(url)
+        verdict.requested_url = request_url if request_url != url else None
+    verdict.timings["fetch"] = time.perf_counter() - start
+    if redirects:
+        redirects.learn(request_url, r)
+
+    # Get a real 404 in the same folder
+    url_404 = get_404_url(url)
+    if redirects:
+        url_404 = redirects.rewrite(url_404, trailing_slash=False)
+
+    # In incremental mode, if neither the page nor its baseline changed since the last run, reuse its verdict
+    if prev and ScanState.is_unchanged(prev, r):
+        start = time.perf_counter()
+        unchanged = prev["verdict"]["reason"] == "status-404" or check_baseline_unchanged(url_404, transport, state, cache_404)
+        if unchanged:
+            logging.info(f"[*] {url} unchanged since the last run, reusing its verdict")
+            return Verdict(**{**prev["verdict"], "timings": verdict.timings, "reused": True})
+        verdict.timings["baseline"] = time.perf_counter() - start
+
+    if r.status_code == 304:
+        # The verdict can't be reused (e.g. the baseline changed), so the page needs to be checked again with its full body
+        start = time.perf_counter()
+        try:
+            r = transport.get(request_url, timeout=10)
+        except:
+            logging.info(f"  [!] Timeout while awaiting for get request for {url}. Page might be down. Removing")
+            return verdict.decide(False, "unreachable")
+        verdict.timings["fetch"] += time.perf_counter() - start
+
+    verdict.add_response(r)
+    if state:
+        state.record_url_response(url, r)
+
+    # If status code is 404, it's 404
+    if str(r.status_code) == "404":
+        return verdict.decide(False, "status-404")
+
+    host_profile = profiler.get_baseline(url_404) if profiler and url_404 not in cache_404 else None
+
+    if url_404 in cache_404:
+        r_404 = cache_404[url_404]
+
+    elif host_profile:
+        # The host always answers the same to nonexistent paths, so no need to probe this folder
+        verdict.host_profile, r_404, sample_url_404 = host_profile
+        logging.info(f"  [*] Skipping the 404 probe of {url_404} as the host is profiled as {verdict.host_profile}")
+        if state:
+            state.record_profiled_baseline(url_404, sample_url_404)
+
+    else:
+        r_404 = None
+        start = time.perf_counter()
+        try:
+            r_404 = transport.get(url_404, timeout=5, allow_redirects=True)
+        except Exception as e:
+            logging.info(f"  [!] Timeout while awaiting for 404 get request. Retrying... \n{e}")
+            try:
+                r_404 = transport.get(url_404, timeout=10, allow_redirects=True) #Max timeout reduced to 10s
+            except Exception as e:
+                logging.info(f"  [!] Timeout while awaiting for 404 get request. Page might be down. Removing\n {e}")
+                verdict.timings["baseline"] = time.perf_counter() - start
+                return verdict.decide(False, "baseline-unreachable")
+        verdict.timings["baseline"] = verdict.timings.get("baseline", 0) + time.perf_counter() - start
+        if redirects:
+            redirects.learn(url_404, r_404)
+
+        if r_404:
+            cache_404[url_404] = r_404
+        if state:
+            state.record_baseline(url_404, r_404)
+        if profiler:
+            profiler.add_sample(url_404, r_404)
+
+    start = time.perf_counter()
+    try:
+        # If "not found" texts in titles of HTML, it's 404
+        analysis = analyze_response(r, r_404, analyzer, cache_404_badpt)
+        verdict.title = analysis["title"]
+        r_404_badpt = analysis["baseline_bad_title"]
+        r_badpt = analysis["bad_title"]
+
+        # Try to avoid false positives of the tags checking that the tags are also in the 404 response.
+        if r_badpt:
+            if r_404_badpt == None or r_404_badpt:
+                return verdict.decide(False, "bad-title")
+
+        # If redirects to root or suspicious valid page (like the one for the real 404), it's 404
+        if check_redirects(request_url, r, r_404):
+            return verdict.decide(False, "bad-redirect")
+
+        # Check if other status codes are used as 404
+        if r_404 != None:
+            if r_404.status_code == r.status_code and str(r.status_code).startswith("4") or str(r.status_code).startswith("5"):
+                logging.info(f"  [!] Weird 404 status code detected: {r.status_code} for {url} Skipping.")
+                return verdict.decide(False, "error-status")
+
+            # If same content as real 404, it's a 404
+            if r_404.content == r.content:
+                logging.info(f"  [!] Same content as error detected for {url}. Skipping.")
+                return verdict.decide(False, "same-content-as-404")
+
+            # If different status codes from real 404, then it might not be a 404 and no need to check with JS engine
+            if r_404.status_code != r.status_code:
+                logging.info(f"[*] {url} found legit in {r.url}")
+                return verdict.decide(True, "status-differs-from-404")
+        else:
+            logger.info(f"No 404: {url_404}")
+
+        if analysis["needs_js"]:
+            # Use a JS engine to check if 404 with the final url after redirects (as it might end up being duplicated)
+            verdict.shell_digest = get_shell_fingerprint(r.content)
+            return verdict.decide(None, "js-required")
+
+        logging.info(f"[*] {url} found legit in {r.url} as no JS required!")
+        return verdict.decide(True, "no-js-required") # The final url after redirects is the one reported
+    finally:
+        verdict.timings["analysis"] = time.perf_counter() - start
+
+
+def check_js_methods(urls, p_verdicts, user_agent, shells=None, baselines=None, render_cache=None):
+    """
+    **Renders** each URL with a headless browser and appends a `Verdict` per URL to `p_verdicts`.
+    Playwright is only imported inside the browser processes.
+
+    The rendered DOM is compared with the rendered 404 of its folder (stored in `baselines`).
+    `shells` maps the URLs to the fingerprint of their HTML before rendering: the URLs with the same
+    shell and route pattern as an already rendered one reuse its outcome from `render_cache`.
+    `baselines` and `render_cache` can be shared between processes (e.g. `Manager().dict()`).
+    """
+    shells = shells or {}
+    baselines = {} if baselines is None else baselines
+    render_cache = {} if render_cache is None else render_cache
+
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch()
+            page = browser.new_page()
+            page.set_default_timeout(15000); #Max timeout reduced to 15s
+
+            # navigate to the page
+            for url in urls:
+                cache_key = (shells[url], get_route_pattern(url)) if url in shells else None
+                if cache_key in render_cache:
+                    good, reason, final_url = render_cache[cache_key]
+                    logging.info(f"  [*] Same shell and route as an already rendered URL, reusing its outcome for {url}")
+                    p_verdicts.append(Verdict(url, final_url or url, good, reason, render_cached=True))
+                    continue
+
+                try:
+                    url_404 = get_404_url(url)
+                    start = time.perf_counter()
+                    baseline = render_baseline(page, url_404, baselines)
+                    verdict = Verdict(url, None, None, "")
+                    verdict.timings["baseline"] = time.perf_counter() - start
+
+                    logging.info(f"  [*] Checking dynamically: {url}")
+                    start = time.perf_counter()
+                    response = page.goto(url)
+                    html = page.content()
+                    bad_js_reason = js_checks(url, page, html)
+                    verdict.timings["render"] = time.perf_counter() - start
+                    verdict.add_page(page, response)
+
+                    # If it renders the same as a nonexistent path of the same folder, it's 404
+                    if not bad_js_reason and baseline:
+                        baseline_url, baseline_fingerprint = baseline
+                        if page.url == baseline_url and page.url != url:
+                            logging.info(f"      [-] JS of {url} redirected to the same page as a 404: {page.url}")
+                            bad_js_reason = "js-same-as-404"
+                        elif get_render_fingerprint(html, [url, page.url, url_404, baseline_url]) == baseline_fingerprint:
+                            logging.info(f"      [-] JS of {url} rendered the same as a 404")
+                            bad_js_reason = "js-same-as-404"
+
+                    if bad_js_reason:
+                        verdict.decide(False, bad_js_reason)
+                    else:
+                        verdict.decide(True, "js-ok") # Store the final URL so if difefrent pages redirect to the same one, duplicates are removed
+
+                    if cache_key:
+                        # Only keep the final URL if it doesn't depend on the URL (e.g. a redirect to the root)
+                        render_cache[cache_key] = (verdict.good, verdict.reason, verdict.final_url if verdict.final_url != url else None)
+                    p_verdicts.append(verdict)
+                except:
+                    logging.info(f"      [!] Timeout while awaiting for tags or connecting. {url} may be down.")
+                    p_verdicts.append(Verdict(url, None, False, "js-unreachable"))
+
+            browser.close()
+    except Exception as e:
+        logging.error(f"Browser launch timed out: {e}")
@@ -0,0 +1,252 @@
+import re
+from urllib.parse import urlparse
+
+
+#############################
+#### REMOVE USELESS URLS ####
+#############################
+
+def get_path_parts(url):
+    """
+    **Splits** the URL path into **folders** (ignoring empty segments).
+    """
+    parsed = urlparse(url)
+    # Example: 'http://example.com/en/articles/page' -> ['en', 'articles', 'page']
+    path_parts = [p for p in parsed.path.split('/') if p]
+    return parsed, path_parts
+
+
+def remove_urls_with_large_depth(urls, max_depth=20):
+    """
+    **Removes** URLs that have a path depth larger than `max_depth`.
+    """
+    filtered = []
+    for url in urls:
+        _, path_parts = get_path_parts(url)
+        # **Check if depth is > max_depth**
+        if len(path_parts) <= max_depth:
+            filtered.append(url)
+    return filtered
+
+
+def remove_urls_with_repeated_folders(urls, max_repeats=2):
+    """
+    **Removes** URLs that have the same folder name repeated
+    more than `max_repeats` times **in a row**.
+    """
+    filtered = []
+    for url in urls:
+        _, path_parts = get_path_parts(url)
+        # **Check for repeated folder names in a row**
+        has_too_many_repeats = False
+        current_count = 1
+        for i in range(1, len(path_parts)):
+            if path_parts[i] == path_parts[i-1]:
+                current_count += 1
+                if current_count > max_repeats:
+                    has_too_many_repeats = True
+                    break
+            else:
+                current_count = 1
+        if not has_too_many_repeats:
+            filtered.append(url)
+    return filtered
+
+def normalize_languages(urls):
+    """
+    **Normalization** steps based on **grouping** URLs that differ only by their **first folder**:
+
+    1. Group URLs by (scheme, domain, rest_of_path_ignoring_first_folder).
+    2. If a group has only 1 URL, keep it.
+    3. If multiple:
+       - Check if any first folder is "English-like" (starts with `en`).
+         If so, pick it as default.
+         Else if any is `zh`, pick that.
+         Else if any is `es`, pick that.
+         Else pick the first folder in that group.
+       - Build a **single** URL using the chosen folder and the shared rest path.
+    4. **Return** all final URLs (duplicates removed).
+    """
+
+    # A helper to detect an "English-like" folder (like "en", "en-us", etc.)
+    def is_english_folder(folder):
+        # Lowercase check: does it start with "en"?
+        return folder == "en" or (folder.lower().startswith("en-") and len(folder) < 7)
+
+    grouped = {}  # (scheme, domain, rest_path) -> list of dicts with {folder, original_url}
+
+    for url in urls:
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        domain = parsed.netloc.lower()
+
+        # Split path into folders
+        path_parts = [p for p in parsed.path.split('/') if p]
+
+        if not path_parts:
+            # No folders => no "first folder", rest path is empty
+            first_folder = ""
+            rest_path = ""
+        else:
+            # We'll ALWAYS treat the first part as "folder" (whether language or not)
+            first_folder = path_parts[0]
+            rest_path = "/".join(path_parts[1:])
+
+        key = (scheme, domain, rest_path)
+
+        if key not in grouped:
+            grouped[key] = []
+        grouped[key].append({
+            "folder": first_folder,
+            "original_url": url
+        })
+
+    final_urls = set()
+
+    # Now let's pick the final form for each group
+    for (scheme, domain, rest_path), items in grouped.items():
+        # If there's only 1 item in this group, we keep it as is
+        if len(items) == 1:
+            final_urls.add(items[0]["original_url"])
+            continue
+
+        # If there's more than 1 item, we pick a default folder
+        chosen_folder = None
+
+        # 1) If there's an "English-like" folder
+        english_candidates = [it["folder"] for it in items if is_english_folder(it["folder"])]
+        if english_candidates:
+            chosen_folder = english_candidates[0]
+        else:
+            # 2) If there's a "zh"
+            zh_candidates = [it["folder"] for it in items if it["folder"].lower() == "zh"]
+            if zh_candidates:
+                chosen_folder = zh_candidates[0]
+            else:
+                # 3) If there's an "es"
+                es_candidates = [it["folder"] for it in items if it["folder"].lower() == "es"]
+                if es_candidates:
+                    chosen_folder = es_candidates[0]
+                else:
+                    # 4) Otherwise pick the first folder from the group
+                    chosen_folder = items[0]["folder"]
+
+        # Construct a single final URL for the group
+        # If chosen_folder is empty, that means "root" (no folder).
+        # We'll build the path accordingly
+        # e.g. scheme://domain[/chosen_folder][/rest_path]
+        path_str = ""
+        if chosen_folder:
+            path_str += "/" + chosen_folder
+        if rest_path:
+            path_str += "/" + rest_path
+
+        final_url = f"{scheme}://{domain}{path_str}"
+        final_urls.add(final_url)
+
+    return list(final_urls)
+
+def filter_urls_by_numeric_and_folder_limits(all_urls):
+    """
+    1) Group URLs by (scheme, netloc, 'all but last path folder(s)').
+    2) In each group:
+       - Keep only first 20 URLs whose final path segment is purely numeric.
+       - Then from the entire group (numeric + non-numeric), keep only the first 50.
+    3) Return the filtered list in the original order.
+    """
+
+    # We'll group by (scheme, netloc, 'folder_path_up_to_last_segment')
+    # For example: http://example.com/foo/bar/123
+    #   - final_segment = "123"
+    #   - group_key = (scheme="http", netloc="example.com", folder_path="/foo/bar")
+    #
+    # Then store info about whether final_segment is numeric, plus original index to preserve order.
+
+    # A helper to detect if a final segment is purely numeric
+    def is_numeric_segment(segment):
+        return bool(re.fullmatch(r"\d+", segment))
+
+    grouped = {}
+    # We also keep the order in which URLs appear globally:
+    # We'll store each URL with its group key, final_segment, a boolean is_numeric, and the original index.
+    for idx, url in enumerate(all_urls):
+        parsed = urlparse(url)
+        scheme = parsed.scheme
+        netloc = parsed.netloc
+
+        # Split path into segments
+        parts = [p for p in parsed.path.split('/') if p]
+
+        if not parts:
+            # No final segment
+            final_segment = ""
+            folder_path = ""
+        else:
+            final_segment = parts[-1]
+            folder_path = "/" + "/".join(parts[:-1]) if len(parts) > 1 else ""
+
+        group_key = (scheme, netloc, folder_path)
+
+        if group_key not in grouped:
+            grouped[group_key] = []
+
+        grouped[group_key].append({
+            "url": url,
+            "is_numeric": is_numeric_segment(final_segment),
+            "index": idx
+        })
+
+    # Now let's apply the per-group rules
+    final_urls = []
+
+    for group_key, items in grouped.items():
+        # We want to preserve original order, so sort 'items' by their "index"
+        items.sort(key=lambda x: x["index"])
+
+        # 1) Keep only the first 20 with is_numeric == True
+        numeric_count = 0
+        for item in items:
+            if item["is_numeric"]:
+                numeric_count += 1
+                if numeric_count > 20:
+                    # Mark these for removal
+                    item["remove"] = True
+                else:
+                    item["remove"] = False
+            else:
+                item["remove"] = False
+
+        # 2) Now keep the first 50 overall in this group
+        #    We'll do a second pass counting how many we've kept so far
+        kept_in_group = 0
+        for item in items:
+            if not item["remove"]:
+                kept_in_group += 1
+                if kept_in_group > 50:
+                    # Mark for removal if we're over 50
+                    item["remove"] = True
+
+        # Collect the final set from this group
+        for item in items:
+            if not item["remove"]:
+                final_urls.append(item)
+
+    # Finally, re-sort by original index to restore global order
+    final_urls.sort(key=lambda x: x["index"])
+
+    # Extract just the URLs
+    return [x["url"] for x in final_urls]
+
+
+def filter_and_normalize_urls(all_urls):
+    """
+    Combined pipeline:
+      1) **Remove** URLs with depth > 20.
+      2) **Remove** URLs with repeated folders.
+      3) **Normalize** language paths (favor root, else 'en', 'xh', 'es', else first).
+    """
+    all_urls = remove_urls_with_large_depth(all_urls) # If too many folders, remove
+    all_urls = remove_urls_with_repeated_folders(all_urls) # If 3 or more repeated folders with the same name, remove
+    all_urls = normalize_languages(all_urls) # If same but in different languages, keep only one
+    all_urls = filter_urls_by_numeric_and_folder_limits(all_urls) # If too many files inside a folder, reduce
+    return all_urls
@@ -0,0 +1,27 @@
+import gzip
+import json
+
+
+class JsonlWriter:
+    """
+    **Writes** one JSON object per verdict (see `Verdict.to_dict`), as they are yielded.
+    If the path ends with `.gz` the output is gzip compressed.
+    """
+
+    def __init__(self, path):
+        if path.endswith(".gz"):
+            self.file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, verdict):
+        self.file.write(json.dumps(verdict.to_dict()) + "\n")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
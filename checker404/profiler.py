@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from urllib.parse import urlparse
+
+
+HOST_PROFILE_SAMPLES = 3 # Consistent folder baselines needed to trust the profile of a host
+
+CLEAN_404 = "clean-404"
+REDIRECT_TO_ROOT = "redirect-to-root"
+FIXED_TEMPLATE = "fixed-template"
+VARIES = "varies"
+
+
+def get_host(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+class HostProfiler:
+    """
+    **Learns** how each host answers to nonexistent paths from the folder baselines (`real404i32rohuf` probes):
+
+      - `clean-404`: a real 404 status code.
+      - `redirect-to-root`: a redirect to the root page.
+      - `fixed-template`: always the same soft-404 page (same status code and body).
+      - `varies`: the baselines differ between folders, so they keep being probed.
+
+    Once the baselines of `samples` different folders of a host agree, any of them is equivalent to the baseline of
+    another folder, so the rest of the probes of the host are skipped and counted.
+    """
+
+    def __init__(self, samples=HOST_PROFILE_SAMPLES):
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    @staticmethod
+    def classify(response):
+        """
+        Returns the kind of error behavior of a baseline response and a signature
+        that must be the same in all the baselines of a host with that behavior.
+        """
+        if response.status_code == 404:
+            return CLEAN_404, 404
+        if response.history and urlparse(response.url).path in ("", "/"):
+            return REDIRECT_TO_ROOT, response.url
+        return FIXED_TEMPLATE, (response.status_code, hashlib.sha256(response.content).hexdigest())
+
+    def add_sample(self, url_404, response):
+        kind, signature = self.classify(response)
+        with self.lock:
+            host = self.hosts.setdefault(get_host(url_404), {"kind": None, "signature": None, "folders": set(), "response": None, "sample": None, "skipped": 0})
+            if host["kind"] == VARIES or url_404 in host["folders"]:
+                return # Only different folders count as samples
+            if host["kind"] is not None and (host["kind"], host["signature"]) != (kind, signature):
+                host["kind"] = VARIES
+                host["response"] = host["sample"] = None
+                return
+            host["kind"], host["signature"] = kind, signature
+            host["folders"].add(url_404)
+            host["response"], host["sample"] = response, url_404
+
+    def get_baseline(self, url_404):
+        """
+        Returns (kind, baseline response, 404 URL of that baseline) if the host of `url_404` has a trusted profile, else None.
+        """
+        with self.lock:
+            host = self.hosts.get(get_host(url_404))
+            if not host or host["kind"] == VARIES or len(host["folders"]) < self.samples:
+                return None
+            host["skipped"] += 1
+            return host["kind"], host["response"], host["sample"]
+
+    def report(self):
+        """
+        Returns {host: (kind, skipped baseline probes)} for the profiled hosts.
+        """
+        with self.lock:
+            return {name: (host["kind"], host["skipped"]) for name, host in self.hosts.items()}
@@ -0,0 +1,105 @@
+import threading
+from urllib.parse import urlparse, urlunparse
+
+
+REDIRECT_RULE_HITS = 2 # Redirects of a host to the same scheme/host needed to trust the rule
+TRAILING_SLASH_RULE_HITS = 3 # Redirects adding a trailing slash needed to trust the rule
+
+
+def get_origin(parsed):
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+def is_extensionless(path):
+    """
+    **Checks** if the last folder of the path looks like a directory (no trailing slash and no extension).
+    """
+    last = path.rsplit("/", 1)[-1]
+    return bool(last) and "." not in last
+
+
+class RedirectRules:
+    """
+    **Learns** the canonicalization redirects of each host from `response.history`
+    (http -> https, adding/removing `www.` and adding a trailing slash to folders)
+    and **rewrites** the next URLs of that host so they don't pay that extra round trip.
+
+    A rule is only used after it was seen `REDIRECT_RULE_HITS` (or `TRAILING_SLASH_RULE_HITS`) times,
+    and never if the host was seen answering without that redirect.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origins = {} # origin -> {"target": origin, "hits": n, "disabled": bool}
+        self.slashes = {} # origin -> {"hits": n, "disabled": bool}
+
+    def rewrite(self, url, trailing_slash=True):
+        """
+        Returns the URL the host would redirect `url` to according to the learned rules.
+        `trailing_slash=False` only applies the scheme/host rules (for the 404 probes).
+        """
+        parsed = urlparse(url)
+        with self.lock:
+            for _ in range(3): # Rules can be chained (http://a -> https://a -> https://www.a)
+                rule = self.origins.get(get_origin(parsed))
+                if not rule or rule["disabled"] or rule["hits"] < REDIRECT_RULE_HITS:
+                    break
+                target = urlparse(rule["target"])
+                parsed = parsed._replace(scheme=target.scheme, netloc=target.netloc)
+
+            slash = self.slashes.get(get_origin(parsed))
+            if trailing_slash and slash and not slash["disabled"] and slash["hits"] >= TRAILING_SLASH_RULE_HITS and is_extensionless(parsed.path):
+                parsed = parsed._replace(path=parsed.path + "/")
+
+        return urlunparse(parsed)
+
+    def learn(self, request_url, response):
+        """
+        **Learns** from the redirects followed to get the `response` of `request_url`.
+        """
+        urls = [resp.url for resp in response.history] + [response.url]
+
+        with self.lock:
+            if not response.history:
+                # Served without redirects: the host doesn't canonicalize this URL
+                parsed = urlparse(request_url)
+                self.disable(self.origins, get_origin(parsed))
+                if is_extensionless(parsed.path) and response.status_code < 400:
+                    self.disable(self.slashes, get_origin(parsed))
+                return
+
+            for prev_url, next_url in zip(urls, urls[1:]):
+                prev, nxt = urlparse(prev_url), urlparse(next_url)
+                if prev.query != nxt.query:
+                    return
+
+                if get_origin(prev) != get_origin(nxt) and prev.path.rstrip("/") == nxt.path.rstrip("/"):
+                    self.add_hit(self.origins, get_origin(prev), get_origin(nxt))
+                    if prev.path == nxt.path:
+                        continue
+                    prev = prev._replace(scheme=nxt.scheme, netloc=nxt.netloc)
+
+                if get_origin(prev) == get_origin(nxt) and nxt.path == prev.path + "/" and is_extensionless(prev.path):
+                    self.add_hit(self.slashes, get_origin(nxt))
+                    continue
+
+                return # Not a canonicalization redirect, stop learning from this chain
+
+    def reject(self, request_url):
+        """
+        **Disables** the trailing slash rule of the origin of a URL that answered with an error after adding
+        it the trailing slash (some folders of the host, e.g. an API, don't accept it).
+        """
+        with self.lock:
+            self.disable(self.slashes, get_origin(urlparse(request_url)))
+
+    @staticmethod
+    def add_hit(rules, origin, target=None):
+        rule = rules.setdefault(origin, {"target": target, "hits": 0, "disabled": False})
+        if rule["target"] != target:
+            rule["disabled"] = True
+        rule["hits"] += 1
+
+    @staticmethod
+    def disable(rules, origin):
+        rule = rules.setdefault(origin, {"target": None, "hits": 0, "disabled": False})
+        rule["disabled"] = True
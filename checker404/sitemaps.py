@@ -0,0 +1,229 @@
+import logging
+import requests
+import xml.etree.ElementTree as ET
+
+
+######################################
+#### CHECK URLS BASED ON SITEMAPS ####
+######################################
+
+logger = logging.getLogger(__name__)
+
+# The discovered data is stored in a `domain_data` dictionary (kept by the caller) to avoid re-checking the same domain
+# Structure:
+# domain_data = {
+#   "example.com": {
+#       "subdomains": {
+#           "www": {
+#               "sitemaps": set(["https://www.example.com/sitemap_index.xml", ...]),
+#               "discovered_urls": set(["https://www.example.com/page1", ...])
+#           },
+#           "": { ... },  # empty means "root" domain
+#           ...
+#       },
+#       "all_discovered_urls": set([...])  # union of discovered_urls from all subdomains
+#   },
+#   ...
+# }
+
+def get_tld_and_subdomain(url):
+    """
+    **Parses** the given URL to extract the **TLD** (e.g. 'example.com')
+    and the **subdomain** (e.g. 'blog' in 'blog.example.com').
+    Returns (tld, subdomain).
+    """
+    import tldextract  # Imported lazily, it loads the whole public suffix list
+
+    ext = tldextract.extract(url)
+    tld = f"{ext.domain}.{ext.suffix}"  # e.g. "example.com"
+    subdomain = ext.subdomain or ""      # e.g. "blog" or "" if none
+    return tld.lower(), subdomain.lower()
+
+def get_robots_url(tld, subdomain=""):
+    """
+    Returns a **robots.txt** URL for the **tld** and optional **subdomain**.
+    For a subdomain 'blog' and tld 'example.com', 
+    it might be 'https://blog.example.com/robots.txt'.
+    """
+    if subdomain:
+        return f"https://{subdomain}.{tld}/robots.txt"
+    else:
+        return f"https://{tld}/robots.txt"
+
+def get_root_sitemap_url(tld, subdomain=""):
+    """
+    Returns the **root** sitemap.xml path for a given TLD + subdomain.
+    """
+    if subdomain:
+        return f"https://{subdomain}.{tld}/sitemap.xml"
+    else:
+        return f"https://{tld}/sitemap.xml"
+
+def fetch_robots_sitemaps(tld, subdomain, transport):
+    """
+    **Fetch** the robots.txt for (tld, subdomain) and **parse** out any 'Sitemap:' lines.
+    Returns a set of discovered sitemap URLs.
+    """
+    sitemaps_found = set()
+    url = get_robots_url(tld, subdomain)
+    
+    try:
+        logger.info(f"Fetching robots.txt: {url}")
+        resp = transport.get(url, timeout=5)
+        if resp.status_code == 200:
+            for line in resp.text.splitlines():
+                line = line.strip()
+                # Lines can look like: "Sitemap: https://example.com/sitemap_index.xml"
+                if line.lower().startswith("sitemap:"):
+                    # Extract the URL after "Sitemap:"
+                    #print("Discovered sitemap:", line)
+                    sitemap_url = line.split(":", 1)[1].strip()
+                    sitemaps_found.add(sitemap_url)
+    except requests.RequestException:
+        # Could not fetch robots.txt
+        pass
+    
+    return sitemaps_found
+
+def parse_sitemap(sitemap_url, discovered_urls, discovered_sitemaps, transport, sitemaps_downloaded):
+    """
+    **Parses** the given sitemap URL (which may be an **index** of multiple sitemaps 
+    or a **regular** sitemap of URLs).
+
+    - If it's a sitemap **index**, we grab each child **<loc>** as a new sitemap to parse.
+    - If it's a **regular** sitemap, we grab each **<url><loc>** entry as a discovered URL.
+
+    Updates `discovered_urls` (set of URLs) 
+    and `discovered_sitemaps` (set of sitemaps) in-place.
+    `sitemaps_downloaded` is the set of sitemaps already downloaded (not downloaded again).
+    """
+    try:
+        #print(f"Checking sitemap {sitemap_url}")
+        if sitemap_url in sitemaps_downloaded:
+            return # Already downloaded
+        
+        sitemaps_downloaded.add(sitemap_url)
+        resp = transport.get(sitemap_url, timeout=5)
+        if resp.status_code != 200:
+            return  # Not found or error
+
+        # Parse the XML
+        root = ET.fromstring(resp.content)
+
+        # The root tag can be {...}sitemapindex or {...}urlset
+        tag_lower = root.tag.lower()
+        if "sitemapindex" in tag_lower:
+            # This is an index of sitemaps
+            for child in root.findall(".//{*}sitemap"):
+                loc_el = child.find("{*}loc")
+                if loc_el is not None and loc_el.text:
+                    new_sitemap = loc_el.text.strip()
+                    if new_sitemap not in discovered_sitemaps:
+                        #print(f"Discovered sitemap {new_sitemap} from {sitemap_url}")
+                        discovered_sitemaps.add(new_sitemap)
+                        # parse recursively
+                        parse_sitemap(new_sitemap, discovered_urls, discovered_sitemaps, transport, sitemaps_downloaded)
+        elif "urlset" in tag_lower:
+            # This is a list of URLs
+            for child in root.findall(".//{*}url"):
+                loc_el = child.find("{*}loc")
+                if loc_el is not None and loc_el.text:
+                    discovered_urls.add(loc_el.text.strip())
+        else:
+            # Some sitemaps might have unusual tags, or be empty
+            pass
+
+    except requests.RequestException:
+        # Network or parse error - skip
+        pass
+    except ET.ParseError:
+        # Not valid XML
+        pass
+
+def discover_all_sitemaps_and_urls(tld, subdomain, transport, domain_data, sitemaps_downloaded):
+    """
+    **Discover** all sitemaps and URLs for the given TLD + subdomain:
+      1) Fetch & parse robots.txt for its Sitemaps
+      2) Check default /sitemap.xml
+      3) Recursively parse any discovered sitemaps for more sitemaps
+         or actual URLs.
+    Stores results in `domain_data[tld]['subdomains'][subdomain]`.
+    Also updates `domain_data[tld]['all_discovered_urls']`.
+    """
+    # Ensure structure is present
+    if tld not in domain_data:
+        domain_data[tld] = {
+            "subdomains": {},
+            "all_discovered_urls": set()
+        }
+    if subdomain not in domain_data[tld]["subdomains"]:
+        domain_data[tld]["subdomains"][subdomain] = {
+            "sitemaps": set(),
+            "discovered_urls": set()
+        }
+
+    subdomain_dict = domain_data[tld]["subdomains"][subdomain]
+
+    # 1) Fetch robots
+    found_in_robots = fetch_robots_sitemaps(tld, subdomain, transport)
+    subdomain_dict["sitemaps"].update(found_in_robots)
+
+    # 2) Try default /sitemap.xml
+    sitemap_url = get_root_sitemap_url(tld, subdomain)
+    subdomain_dict["sitemaps"].add(sitemap_url)
+
+    # 3) Recursively parse each discovered sitemap
+    #    collecting all discovered URLs into subdomain_dict["discovered_urls"]
+    #    and new sitemaps into subdomain_dict["sitemaps"]
+    sitemaps_to_check = list(subdomain_dict["sitemaps"])
+
+    for sm in sitemaps_to_check:
+        parse_sitemap(sm, subdomain_dict["discovered_urls"], subdomain_dict["sitemaps"], transport, sitemaps_downloaded)
+
+    # 4) Update the TLD's 'all_discovered_urls' with what we found
+    domain_data[tld]["all_discovered_urls"].update(subdomain_dict["discovered_urls"])
+
+def check_url_in_sitemaps(url, domain_data):
+    """
+    **Check** if the given URL is in the **discovered URLs** for its TLD (+ subdomain).
+    Returns **True** if found, **False** if not.
+    """
+    tld, subdom = get_tld_and_subdomain(url)
+    # If we haven't discovered tld yet, obviously we haven't found the URL
+    if tld not in domain_data:
+        return False
+
+    # We might not always store subdom if it was never discovered, but we can also check
+    # the TLD's all_discovered_urls:
+    return (url in domain_data[tld]["all_discovered_urls"])
+
+def check_based_on_sitemaps(all_urls, good_urls, transport, domain_data=None, sitemaps_downloaded=None):
+    """
+    Main function to loop all input URLs and:
+      - Parse TLD + subdomain
+      - If TLD is new, discover sitemaps for TLD root + subdomain
+      - If TLD exists but subdomain is new, discover sitemaps for subdomain
+      - Then check if the URL is known => Return True or False
+    Pass the same `domain_data` and `sitemaps_downloaded` to reuse what was discovered in previous calls.
+    """
+    domain_data = {} if domain_data is None else domain_data
+    sitemaps_downloaded = set() if sitemaps_downloaded is None else sitemaps_downloaded
+    unknown_urls = []
+    for url in all_urls:
+        tld, subdom = get_tld_and_subdomain(url)
+
+        # If TLD not in domain_data, it's new => discover it
+        if tld not in domain_data:
+            discover_all_sitemaps_and_urls(tld, subdom, transport, domain_data, sitemaps_downloaded)
+
+        # If subdomain not in domain_data[tld]["subdomains"], discover that too
+        elif subdom not in domain_data[tld]["subdomains"]:
+            discover_all_sitemaps_and_urls(tld, subdom, transport, domain_data, sitemaps_downloaded)
+
+        # Now check if URL is in the known set
+        if check_url_in_sitemaps(url, domain_data):
+            good_urls.append(url)
+        else:
+            unknown_urls.append(url)
+
+    return unknown_urls
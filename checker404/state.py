@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+
+
+# Verdicts of temporary failures, the URLs are checked again in the next run instead of reusing them
+TRANSIENT_REASONS = ("unreachable", "baseline-unreachable", "js-unreachable", "js-timeout", "js-process-died", "error")
+
+class ScanState:
+    """
+    **Stores** what a previous run learned so unchanged URLs don't need to be checked again.
+
+    For every URL and every folder baseline (the `real404i32rohuf` probes) it keeps
+    the `ETag`, `Last-Modified` and a digest of the body, plus the final verdict of each URL.
+    The state is a JSON file, loaded when created and written back by `save`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.urls = {}
+        self.baselines = {}
+        self.baseline_status = {} # Baselines already seen during this run -> True if unchanged since the last one
+
+        if os.path.isfile(path):
+            with open(path, "r") as sfile:
+                data = json.load(sfile)
+            self.urls = data.get("urls", {})
+            self.baselines = data.get("baselines", {})
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with self.lock:
+            with open(tmp_path, "w") as sfile:
+                json.dump({"urls": self.urls, "baselines": self.baselines}, sfile)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def digest(response):
+        return hashlib.sha256(response.content).hexdigest()
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Returns the `If-None-Match` / `If-Modified-Since` headers for a stored entry (or None).
+        """
+        if not entry:
+            return None
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers or None
+
+    @staticmethod
+    def is_unchanged(entry, response):
+        """
+        **Checks** if the response is a 304 or has the same body as the stored entry.
+        """
+        if not entry:
+            return False
+        return response.status_code == 304 or entry.get("digest") == ScanState.digest(response)
+
+    @staticmethod
+    def validators(response):
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "digest": ScanState.digest(response),
+        }
+
+    def get_url(self, url):
+        return self.urls.get(url)
+
+    def record_url_response(self, url, response):
+        with self.lock:
+            entry = self.urls.setdefault(url, {})
+            entry.update(self.validators(response))
+            entry.pop("verdict", None) # Until the new verdict is recorded
+
+    def copy_url_response(self, source_url, url):
+        """
+        Stores for `url` the validators of the response of `source_url` (`url` was collapsed into its request).
+        """
+        with self.lock:
+            source = self.urls.get(source_url)
+            if source:
+                self.urls[url] = {key: value for key, value in source.items() if key != "verdict"}
+
+    def record_verdict(self, url, verdict):
+        with self.lock:
+            if verdict.reason in TRANSIENT_REASONS:
+                self.urls.pop(url, None) # Its validators may still match the page when it's back
+            elif url in self.urls:
+                self.urls[url]["verdict"] = verdict.to_dict()
+
+    def get_baseline(self, url_404):
+        return self.baselines.get(url_404)
+
+    def is_baseline_unchanged(self, url_404):
+        """
+        Returns True/False if the baseline was already found unchanged/changed during this run, else None.
+        """
+        return self.baseline_status.get(url_404)
+
+    def record_baseline(self, url_404, response):
+        with self.lock:
+            if response.status_code == 304:
+                self.baseline_status.setdefault(url_404, True)
+                return
+            entry = self.baselines.get(url_404)
+            self.baseline_status.setdefault(url_404, self.is_unchanged(entry, response))
+            self.baselines[url_404] = self.validators(response)
+
+    def record_profiled_baseline(self, url_404, sample_url_404):
+        """
+        Stores that the baseline of a folder wasn't probed because the host profile made it equivalent to `sample_url_404`.
+        """
+        with self.lock:
+            self.baselines[url_404] = {"profiled_as": sample_url_404}
@@ -0,0 +1,90 @@
+import http.cookiejar
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Transport:
+    """
+    **Shared** HTTP client used by all the stages so connections are kept alive and reused.
+
+    By default it's a `requests.Session` with one keep-alive pool of `threads` connections per host.
+    With `http2=True` an `httpx` client is used instead (if `httpx` and `h2` are installed),
+    multiplexing the requests to the same host over a single connection.
+    Like the plain `requests.get` calls it replaces, cookies aren't kept between requests.
+    """
+
+    def __init__(self, threads=50, user_agent=None, http2=False):
+        self.http2 = False
+        self.client = None
+
+        if http2:
+            try:
+                import httpx
+
+                self.client = httpx.Client(
+                    http2=True,
+                    verify=False,
+                    cookies=http.cookiejar.CookieJar(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])), # Don't keep cookies between requests
+                    limits=httpx.Limits(max_connections=threads, max_keepalive_connections=threads),
+                )
+                self.http2 = True
+            except ImportError as e:
+                logging.warning(f"HTTP/2 not available ({e}), using HTTP/1.1 keep-alive pools")
+
+        if self.client is None:
+            self.client = requests.Session()
+            self.client.verify = False
+            self.client.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[])) # Don't keep cookies between requests
+            adapter = HTTPAdapter(pool_connections=threads, pool_maxsize=threads)
+            self.client.mount("http://", adapter)
+            self.client.mount("https://", adapter)
+
+        if user_agent:
+            self.client.headers["User-Agent"] = user_agent
+
+    def get(self, url, timeout=5, allow_redirects=True, headers=None):
+        """
+        **GET** the URL using the shared connection pools.
+        Returns a `requests.Response` (or an `H2Response` exposing the same attributes).
+        Network errors are raised as `requests.RequestException`.
+        """
+        if not self.http2:
+            return self.client.get(url, timeout=timeout, allow_redirects=allow_redirects, headers=headers)
+
+        import httpx
+
+        try:
+            return H2Response(self.client.get(url, timeout=timeout, follow_redirects=allow_redirects, headers=headers))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def close(self):
+        self.client.close()
+
+
+class H2Response:
+    """
+    **Wraps** an `httpx.Response` exposing the `requests.Response` attributes used by the checks.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.url = str(response.url)
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        self.encoding = response.encoding
+        self.is_redirect = response.is_redirect
+        self.is_permanent_redirect = response.is_redirect and response.status_code in (301, 308)
+        self.history = [H2Response(r) for r in response.history]
+
+    @property
+    def text(self):
+        # Only decoded when read (the checks analyze the raw bytes in `content`)
+        return self._response.text
+
+    def __bool__(self):
+        # Same truthiness as requests.Response
+        return self.status_code < 400